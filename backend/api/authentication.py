@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from backend.cache import get_cache_version, is_cache_shared
+
+
+def get_user_cache_version_name(user_id):
+    return f'user:{user_id}'
+
+
+def copy_token(token):
+    token = copy(token)
+    token.user = copy(token.user)
+    return token
+
+
+class TokenCache:
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+tokens = TokenCache(
+    settings.AUTH_TOKEN_CACHE_SIZE,
+    settings.AUTH_TOKEN_CACHE_TIMEOUT,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def get_cached_token(self, key):
+        entry = tokens.get(key)
+        if entry is None:
+            entry = cache.get(f'token:{key}')
+        if entry is None:
+            return None
+        token, version = entry
+        name = get_user_cache_version_name(token.user_id)
+        if version != get_cache_version(name):
+            return None
+        tokens.set(key, entry)
+        return token
+
+    def cache_token(self, key, token):
+        name = get_user_cache_version_name(token.user_id)
+        entry = (copy_token(token), get_cache_version(name))
+        tokens.set(key, entry)
+        cache.set(
+            f'token:{key}',
+            entry,
+            timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+        )
+
+    def authenticate_credentials(self, key):
+        if not is_cache_shared():
+            return super().authenticate_credentials(key)
+        token = self.get_cached_token(key)
+        if token is not None:
+            token = copy_token(token)
+            return token.user, token
+        user, token = super().authenticate_credentials(key)
+        self.cache_token(key, token)
+        return user, token
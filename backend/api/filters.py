@@ -1,30 +1,107 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import connections
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+)
+from django.forms import MultipleChoiceField
 from django_filters.rest_framework import (
-    AllValuesMultipleFilter,
     BooleanFilter,
     CharFilter,
-    ModelMultipleChoiceFilter,
+    Filter,
+    NumberFilter,
     FilterSet,
 )
 
-from recipes.models import Ingredient, Recipe, Tag
+from backend.constants import MIN_LENGTH_SUBSTRING_SEARCH, SEARCH_CONFIG
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+)
+
+
+class SlugMultipleChoiceField(MultipleChoiceField):
+
+    def valid_value(self, value):
+        try:
+            validate_slug(value)
+        except ValidationError:
+            return False
+        return True
+
+
+class AuthorMultipleChoiceField(MultipleChoiceField):
+
+    def valid_value(self, value):
+        return value == 'me' or value.isdigit()
+
+
+class AuthorFilter(Filter):
+    field_class = AuthorMultipleChoiceField
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        author_ids = {int(author) for author in value if author.isdigit()}
+        user = self.parent.request.user
+        if 'me' in value and user.is_authenticated:
+            author_ids.add(user.id)
+        return queryset.filter(author__in=author_ids)
+
+
+class TagSlugsFilter(Filter):
+    field_class = SlugMultipleChoiceField
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'),
+            tag__slug__in=value,
+        )))
 
 
 class IngredientFilterSet(FilterSet):
-    name = CharFilter(lookup_expr='istartswith')
+    name = CharFilter(method='filter_name')
+    limit = NumberFilter(min_value=1)
 
     class Meta:
         model = Ingredient
         fields = ('name',)
 
+    def filter_queryset(self, queryset):
+        limit = self.form.cleaned_data.pop('limit', None)
+        queryset = super().filter_queryset(queryset)
+        if limit:
+            return queryset[:int(limit)]
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        if len(value) < MIN_LENGTH_SUBSTRING_SEARCH:
+            return queryset.filter(name__istartswith=value)
+        return queryset.filter(name__icontains=value).annotate(
+            is_prefix=ExpressionWrapper(
+                Q(name__istartswith=value),
+                output_field=BooleanField(),
+            ),
+        ).order_by('-is_prefix', 'name')
+
 
 class RecipeFilterSet(FilterSet):
     name = CharFilter(lookup_expr='istartswith')
-    author = AllValuesMultipleFilter()
-    tags = ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
-    )
+    search = CharFilter(method='filter_search')
+    author = AuthorFilter()
+    tags = TagSlugsFilter()
     is_favorited = BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = BooleanFilter(method='filter_is_in_shopping_cart')
 
@@ -36,14 +113,40 @@ class RecipeFilterSet(FilterSet):
             'tags',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
         )
 
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value)
+                | Q(text__icontains=value)
+                | Exists(RecipeIngredient.objects.filter(
+                    recipe=OuterRef('pk'),
+                    ingredient__name__icontains=value,
+                ))
+            )
+        query = SearchQuery(
+            value,
+            config=SEARCH_CONFIG,
+            search_type='websearch',
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+        ).order_by('-rank', '-pub_date')
+
+    def filter_relation(self, queryset, model, value):
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        in_relation = Exists(model.objects.filter(
+            user=user,
+            recipe=OuterRef('pk'),
+        ))
+        return queryset.filter(in_relation if value else ~in_relation)
+
     def filter_is_favorited(self, queryset, name, value):
-        if self.request.user.is_authenticated:
-            return queryset.filter(in_favorite__user=self.request.user)
-        return queryset
+        return self.filter_relation(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if self.request.user.is_authenticated:
-            return queryset.filter(in_shopping_cart__user=self.request.user)
-        return queryset
+        return self.filter_relation(queryset, ShoppingCart, value)
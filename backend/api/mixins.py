@@ -1,6 +1,60 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
 from rest_framework.viewsets import GenericViewSet
 
+from backend.cache import get_cache_version
 
-class RetriveListViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
+NANOSECONDS_IN_SECOND = 10 ** 9
+
+
+class ConditionalResponseMixin:
+    cache_version_name = None
+    cache_version = None
+
+    def respond_conditionally(self, handler, request, *args, **kwargs):
+        self.cache_version = get_cache_version(self.cache_version_name)
+        etag = '"{}-{}-{}"'.format(
+            self.cache_version_name,
+            self.cache_version,
+            request.accepted_renderer.format,
+        )
+        last_modified = self.cache_version // NANOSECONDS_IN_SECOND
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (HTTP_200_OK, HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.respond_conditionally(
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.respond_conditionally(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class RetriveListViewSet(
+    ConditionalResponseMixin,
+    ListModelMixin,
+    RetrieveModelMixin,
+    GenericViewSet,
+):
     pass
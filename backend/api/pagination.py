@@ -0,0 +1,85 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from backend.cache import COUNT_CACHE_VERSION, get_cache_version
+
+
+class CachedCountPaginator(Paginator):
+
+    def get_estimated_count(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                (self.object_list.model._meta.db_table,),
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            estimate = self.get_estimated_count()
+            if (
+                estimate is not None
+                and estimate > settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+            ):
+                return estimate
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'pagination_count:' + md5(
+            repr((sql, params)).encode()
+        ).hexdigest()
+        return cache.get_or_set(
+            key,
+            queryset.count,
+            timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+            version=get_cache_version(COUNT_CACHE_VERSION),
+        )
+
+
+class ViewCursorPagination(CursorPagination):
+
+    def get_ordering(self, request, queryset, view):
+        return view.cursor_ordering
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+    cursor_pagination_class = ViewCursorPagination
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset,
+                request,
+                view,
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
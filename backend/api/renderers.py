@@ -0,0 +1,101 @@
+from csv import writer
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+SHOPPING_LIST_TITLE = 'Список покупок:'
+SHOPPING_LIST_TEMPLATE = '{name} ({measurement_unit}) - {total_amount}'
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListRenderer(BaseRenderer):
+    charset = 'utf-8'
+    filename = 'shopping_list'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return str(data.get('detail', data)).encode()
+        return b''.join(self.stream(data))
+
+    def stream(self, ingredients):
+        raise NotImplementedError
+
+    def get_content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def get_filename(self):
+        return f'{self.filename}.{self.format}'
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        yield SHOPPING_LIST_TITLE.encode()
+        separator = '\n'
+        for ingredient in ingredients:
+            line = separator + SHOPPING_LIST_TEMPLATE.format(**ingredient)
+            yield line.encode()
+            separator = ',\n'
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('Ингредиент', 'Единицы измерения', 'Количество')
+
+    def stream(self, ingredients):
+        csv_writer = writer(Echo())
+        yield csv_writer.writerow(self.header).encode()
+        for ingredient in ingredients:
+            yield csv_writer.writerow((
+                ingredient['name'],
+                ingredient['measurement_unit'],
+                ingredient['total_amount'],
+            )).encode()
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    margin = 50
+
+    def stream(self, ingredients):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase.pdfmetrics import registerFont
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfgen.canvas import Canvas
+
+        registerFont(TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT))
+        buffer = BytesIO()
+        canvas = Canvas(buffer, pagesize=A4)
+        width, height = A4
+        line_height = self.font_size * 1.5
+        y = height - self.margin
+        canvas.setFont(self.font_name, self.font_size)
+        for line in self.get_lines(ingredients):
+            if y < self.margin:
+                canvas.showPage()
+                canvas.setFont(self.font_name, self.font_size)
+                y = height - self.margin
+            canvas.drawString(self.margin, y, line)
+            y -= line_height
+        canvas.save()
+        yield buffer.getvalue()
+
+    def get_lines(self, ingredients):
+        yield SHOPPING_LIST_TITLE
+        for ingredient in ingredients:
+            yield SHOPPING_LIST_TEMPLATE.format(**ingredient)
@@ -1,13 +1,14 @@
-from django.db.models import F
-from django.db.transaction import atomic
-from drf_extra_fields.fields import Base64ImageField
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.db.transaction import atomic, on_commit
 from rest_framework.exceptions import ValidationError
 from rest_framework.serializers import (
-    IntegerField,
     ModelSerializer,
     PrimaryKeyRelatedField,
+    ReadOnlyField,
     SerializerMethodField,
 )
+from recipes.images import schedule_image_processing
 from recipes.models import (
     Ingredient,
     Recipe,
@@ -16,9 +17,13 @@ from recipes.models import (
     User,
 )
 from .utils import (
+    Base64OrUploadedImageField,
+    ImageVariantsField,
     ReadOnlyModelSerializer,
     add_tags_ingredients,
-    remove_tags_ingredients,
+    get_recipe_prefetches,
+    get_viewer,
+    update_tags_ingredients,
 )
 
 
@@ -42,11 +47,8 @@ class UserSerializer(ModelSerializer):
         }
 
     def get_is_subscribed(self, author):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated
-            and user.subscriptions.filter(author=author).exists()
-        )
+        viewer = get_viewer(self.context.get('request'))
+        return author.id in viewer.subscription_ids
 
 
 class IngredientSerializer(ReadOnlyModelSerializer):
@@ -56,11 +58,13 @@ class IngredientSerializer(ReadOnlyModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class IngredientResponseSerializer(ReadOnlyModelSerializer):
-    amount = IntegerField()
+class RecipeIngredientResponseSerializer(ReadOnlyModelSerializer):
+    id = ReadOnlyField(source='ingredient.id')
+    name = ReadOnlyField(source='ingredient.name')
+    measurement_unit = ReadOnlyField(source='ingredient.measurement_unit')
 
     class Meta:
-        model = Ingredient
+        model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
@@ -93,7 +97,8 @@ class RecipeSerializer(ModelSerializer):
     )
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
-    image = Base64ImageField()
+    image = Base64OrUploadedImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -106,6 +111,7 @@ class RecipeSerializer(ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
@@ -142,21 +148,19 @@ class RecipeSerializer(ModelSerializer):
             raise ValidationError(
                 {'image': 'Обязательно добавьте изображение рецепта.'}
             )
+        if value.size > settings.RECIPE_IMAGE_MAX_SIZE:
+            raise ValidationError(
+                {'image': 'Изображение рецепта слишком большое.'}
+            )
         return value
 
     def get_is_favorited(self, recipe):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated
-            and user.favorites.filter(recipe=recipe).exists()
-        )
+        viewer = get_viewer(self.context.get('request'))
+        return recipe.id in viewer.favorite_ids
 
     def get_is_in_shopping_cart(self, recipe):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated
-            and user.shopping_cart.filter(recipe=recipe).exists()
-        )
+        viewer = get_viewer(self.context.get('request'))
+        return recipe.id in viewer.shopping_cart_ids
 
     @atomic
     def create(self, validated_data):
@@ -165,21 +169,27 @@ class RecipeSerializer(ModelSerializer):
         ingredients = validated_data.pop('ingredient_relations')
         recipe = Recipe.objects.create(**validated_data, author=user)
         add_tags_ingredients(recipe, tags, ingredients)
+        Recipe.objects.filter(id=recipe.id).update_search_vector()
+        on_commit(lambda: schedule_image_processing(recipe.id))
         return recipe
 
     @atomic
     def update(self, recipe, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredient_relations')
-        remove_tags_ingredients(recipe)
-        add_tags_ingredients(recipe, tags, ingredients)
-        return super().update(recipe, validated_data)
+        update_tags_ingredients(recipe, tags, ingredients)
+        recipe = super().update(recipe, validated_data)
+        Recipe.objects.filter(id=recipe.id).update_search_vector()
+        if recipe.image_replaced:
+            on_commit(lambda: schedule_image_processing(recipe.id))
+        return recipe
 
     def to_representation(self, recipe):
+        prefetch_related_objects([recipe], *get_recipe_prefetches())
         data = super(RecipeSerializer, self).to_representation(recipe)
         tags = TagSerializer(recipe.tags, many=True).data
-        ingredients = IngredientResponseSerializer(
-            recipe.ingredients.annotate(amount=F('recipe_relations__amount')),
+        ingredients = RecipeIngredientResponseSerializer(
+            recipe.ingredient_relations,
             many=True,
         ).data
         data.update(tags=tags, ingredients=ingredients)
@@ -187,10 +197,11 @@ class RecipeSerializer(ModelSerializer):
 
 
 class RecipeResponseSerializer(ReadOnlyModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
 
 class SubscribeSerializer(ReadOnlyModelSerializer):
@@ -212,8 +223,10 @@ class SubscribeSerializer(ReadOnlyModelSerializer):
         )
 
     def get_is_subscribed(self, author):
-        user = self.context.get('request').user
-        return user.subscriptions.filter(author=author).exists()
+        viewer = get_viewer(self.context.get('request'))
+        return author.id in viewer.subscription_ids
 
     def get_recipes_count(self, author):
+        if hasattr(author, 'recipes_count'):
+            return author.recipes_count
         return author.recipes.count()
@@ -0,0 +1,150 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db.transaction import on_commit
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from backend.cache import (
+    COUNT_CACHE_VERSION,
+    INGREDIENTS_CACHE_VERSION,
+    RECIPES_CACHE_VERSION,
+    TAGS_CACHE_VERSION,
+    bump_cache_version,
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+    ShoppingListItem,
+    StaleFile,
+    Tag,
+    User,
+)
+from users.models import Subscription
+from .authentication import get_user_cache_version_name
+
+
+def is_last_login_update(update_fields):
+    return update_fields is not None and update_fields <= {'last_login'}
+
+
+def bump_count_cache_version(update_fields=None, **kwargs):
+    if is_last_login_update(update_fields):
+        return
+    on_commit(lambda: bump_cache_version(COUNT_CACHE_VERSION))
+
+
+for model in (
+    Recipe,
+    RecipeTag,
+    RecipeIngredient,
+    Ingredient,
+    Favorite,
+    ShoppingCart,
+    Subscription,
+    User,
+):
+    post_save.connect(bump_count_cache_version, sender=model)
+    post_delete.connect(bump_count_cache_version, sender=model)
+
+
+def bump_recipes_cache_version(update_fields=None, **kwargs):
+    if is_last_login_update(update_fields):
+        return
+    on_commit(lambda: bump_cache_version(RECIPES_CACHE_VERSION))
+
+
+for model in (Recipe, RecipeTag, RecipeIngredient, Ingredient, Tag, User):
+    post_save.connect(bump_recipes_cache_version, sender=model)
+    post_delete.connect(bump_recipes_cache_version, sender=model)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    bump_cache_version(get_user_cache_version_name(instance.id))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    bump_cache_version(get_user_cache_version_name(instance.user_id))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_cache_version(**kwargs):
+    bump_cache_version(INGREDIENTS_CACHE_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_recipes_search_vector(sender, instance, created, **kwargs):
+    if not created:
+        Recipe.objects.filter(ingredients=instance).update_search_vector()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_cache_version(**kwargs):
+    bump_cache_version(TAGS_CACHE_VERSION)
+
+
+def get_shopping_list_changes(cart, sign):
+    return {
+        (cart.user_id, ingredient_id): sign * amount
+        for ingredient_id, amount in RecipeIngredient.objects.filter(
+            recipe=cart.recipe_id,
+        ).values_list('ingredient', 'amount')
+    }
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        ShoppingListItem.objects.apply_changes(
+            get_shopping_list_changes(instance, 1)
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    ShoppingListItem.objects.apply_changes(
+        get_shopping_list_changes(instance, -1)
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_old_image(sender, instance, raw, update_fields, **kwargs):
+    instance.old_image = None
+    instance.image_replaced = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    instance.old_image = Recipe.objects.filter(pk=instance.pk).values_list(
+        'image',
+        flat=True,
+    ).first()
+
+
+@receiver(post_save, sender=Recipe)
+def collect_replaced_image(sender, instance, created, raw, **kwargs):
+    if raw or created:
+        return
+    old_image = getattr(instance, 'old_image', None)
+    if old_image is None or old_image == instance.image.name:
+        return
+    if old_image:
+        StaleFile.objects.create(name=old_image)
+    instance.image_variants = {}
+    instance.image_replaced = True
+    Recipe.objects.filter(pk=instance.pk).update(image_variants={})
+
+
+@receiver(post_delete, sender=Recipe)
+def collect_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        StaleFile.objects.create(name=instance.image.name)
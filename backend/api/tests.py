@@ -0,0 +1,193 @@
+import tracemalloc
+from base64 import b64encode
+from io import BytesIO
+from os import urandom
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import mock
+
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag,
+    User,
+)
+from .pagination import PageNumberOrCursorPagination
+
+RECIPES_COUNT = 12
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAAAA'
+    'ggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+
+class RecipeQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cook@foodgram.ru',
+            username='cook',
+            first_name='Иван',
+            last_name='Поваров',
+            password='Secret-Pass-123',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tags = Tag.objects.bulk_create([
+            Tag(name=f'Тэг {number}', color='#FF0000', slug=f'tag{number}')
+            for number in range(3)
+        ])
+        cls.ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        ])
+        cls.recipes = Recipe.objects.bulk_create([
+            Recipe(
+                author=cls.user,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/image.png',
+            )
+            for number in range(RECIPES_COUNT)
+        ])
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in cls.recipes
+            for tag in cls.tags[:2]
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=5)
+            for recipe in cls.recipes
+            for ingredient in cls.ingredients[:3]
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_recipe_list_queries_do_not_depend_on_page_size(self):
+        for page_size in (2, 10):
+            cache.clear()
+            with mock.patch.object(
+                PageNumberOrCursorPagination,
+                'page_size',
+                page_size,
+            ):
+                with self.assertNumQueries(8):
+                    response = self.client.get('/api/recipes/')
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_recipe_detail_queries(self):
+        with self.assertNumQueries(7):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(len(response.json()['ingredients']), 3)
+
+    def test_author_filter_does_not_select_distinct_authors(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/recipes/?author={self.user.id}')
+        self.assertEqual(response.json()['count'], RECIPES_COUNT)
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'DISTINCT' in query['sql'] and 'author_id' in query['sql']
+        ])
+
+    def test_unchanged_put_does_not_write_relations(self):
+        media_root = mkdtemp()
+        self.addCleanup(rmtree, media_root)
+        recipe = self.recipes[0]
+        data = {
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 5}
+                for ingredient in self.ingredients[:3]
+            ],
+        }
+        with override_settings(MEDIA_ROOT=media_root):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.put(
+                    f'/api/recipes/{recipe.id}/',
+                    data,
+                    format='json',
+                )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and (
+                'recipes_recipetag' in query['sql']
+                or 'recipes_recipeingredient' in query['sql']
+            )
+        ])
+
+    def measure_post_peak(self, data, format):
+        tracemalloc.start()
+        try:
+            response = self.client.post('/api/recipes/', data, format=format)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 201, response.content)
+        return peak
+
+    def test_multipart_upload_uses_less_memory_than_base64(self):
+        media_root = mkdtemp()
+        self.addCleanup(rmtree, media_root)
+        size = (1000, 1000)
+        buffer = BytesIO()
+        Image.frombytes('RGB', size, urandom(size[0] * size[1] * 3)).save(
+            buffer,
+            'PNG',
+        )
+        content = buffer.getvalue()
+        data = {
+            'text': 'Описание',
+            'cooking_time': 10,
+            'tags': [self.tags[0].id],
+        }
+        with override_settings(MEDIA_ROOT=media_root):
+            base64_peak = self.measure_post_peak(
+                {
+                    **data,
+                    'name': 'Рецепт base64',
+                    'image': 'data:image/png;base64,'
+                    + b64encode(content).decode(),
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 5}
+                    ],
+                },
+                'json',
+            )
+            multipart_peak = self.measure_post_peak(
+                {
+                    **data,
+                    'name': 'Рецепт multipart',
+                    'image': SimpleUploadedFile(
+                        'image.png',
+                        content,
+                        content_type='image/png',
+                    ),
+                    'ingredients[0]id': self.ingredients[0].id,
+                    'ingredients[0]amount': 5,
+                },
+                'multipart',
+            )
+        self.assertLess(multipart_peak * 2, base64_peak)
@@ -1,6 +1,56 @@
-from rest_framework.serializers import ModelSerializer
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework.serializers import Field, ImageField, ModelSerializer
 
-from recipes.models import RecipeIngredient, RecipeTag
+from recipes.models import (
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+    ShoppingListItem,
+)
+
+
+class Viewer:
+    def __init__(self, user):
+        self.user = user
+
+    def get_ids(self, related_name, field_name):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(
+            getattr(self.user, related_name).values_list(field_name, flat=True)
+        )
+
+    @cached_property
+    def favorite_ids(self):
+        return self.get_ids('favorites', 'recipe_id')
+
+    @cached_property
+    def shopping_cart_ids(self):
+        return self.get_ids('shopping_cart', 'recipe_id')
+
+    @cached_property
+    def subscription_ids(self):
+        return self.get_ids('subscriptions', 'author_id')
+
+
+def get_viewer(request):
+    if not hasattr(request, 'viewer'):
+        request.viewer = Viewer(request.user)
+    return request.viewer
+
+
+def get_recipe_prefetches():
+    return (
+        'tags',
+        Prefetch(
+            'ingredient_relations',
+            queryset=RecipeIngredient.objects.select_related('ingredient'),
+        ),
+    )
 
 
 def add_tags_ingredients(recipe, tags, ingredients):
@@ -16,9 +66,68 @@ def add_tags_ingredients(recipe, tags, ingredients):
     ])
 
 
-def remove_tags_ingredients(recipe):
-    RecipeTag.objects.filter(recipe=recipe).delete()
-    RecipeIngredient.objects.filter(recipe=recipe).delete()
+def update_tags_ingredients(recipe, tags, ingredients):
+    old_tag_ids = set(
+        RecipeTag.objects.filter(recipe=recipe).values_list('tag', flat=True)
+    )
+    new_tag_ids = {tag.id for tag in tags}
+    if old_tag_ids - new_tag_ids:
+        RecipeTag.objects.filter(
+            recipe=recipe,
+            tag__in=old_tag_ids - new_tag_ids,
+        ).delete()
+    RecipeTag.objects.bulk_create([
+        RecipeTag(recipe=recipe, tag_id=tag_id)
+        for tag_id in new_tag_ids - old_tag_ids
+    ])
+    relations = {
+        relation.ingredient_id: relation
+        for relation in RecipeIngredient.objects.filter(recipe=recipe)
+    }
+    old_amounts = {
+        ingredient_id: relation.amount
+        for ingredient_id, relation in relations.items()
+    }
+    new_amounts = {
+        ingredient_data.get('id').id: ingredient_data.get('amount')
+        for ingredient_data in ingredients
+    }
+    created, updated = [], []
+    for ingredient_id, amount in new_amounts.items():
+        relation = relations.pop(ingredient_id, None)
+        if relation is None:
+            created.append(RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            ))
+        elif relation.amount != amount:
+            relation.amount = amount
+            updated.append(relation)
+    if relations:
+        RecipeIngredient.objects.filter(
+            id__in=[relation.id for relation in relations.values()],
+        ).delete()
+    RecipeIngredient.objects.bulk_create(created)
+    RecipeIngredient.objects.bulk_update(updated, ('amount',))
+    update_shopping_lists(recipe, old_amounts, new_amounts)
+
+
+def update_shopping_lists(recipe, old_amounts, new_amounts):
+    deltas = {
+        ingredient_id: new_amounts.get(ingredient_id, 0)
+        - old_amounts.get(ingredient_id, 0)
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+    }
+    if not any(deltas.values()):
+        return
+    ShoppingListItem.objects.apply_changes({
+        (user_id, ingredient_id): delta
+        for user_id in ShoppingCart.objects.filter(
+            recipe=recipe,
+        ).values_list('user', flat=True)
+        for ingredient_id, delta in deltas.items()
+    })
 
 
 class ReadOnlyModelSerializer(ModelSerializer):
@@ -27,3 +136,30 @@ class ReadOnlyModelSerializer(ModelSerializer):
         for field in fields:
             fields[field].read_only = True
         return fields
+
+
+class ImageVariantsField(Field):
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for variant, paths in variants.items():
+            urls[variant] = {}
+            for extension, path in paths.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[variant][extension] = url
+        return urls
+
+
+class Base64OrUploadedImageField(Base64ImageField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return ImageField.to_internal_value(self, data)
+        return super().to_internal_value(data)
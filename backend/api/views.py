@@ -1,12 +1,20 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from django.db import IntegrityError
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.db.models import Count, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.db.transaction import atomic
+from django.http.response import HttpResponse, StreamingHttpResponse
 from djoser.views import UserViewSet
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_200_OK,
@@ -16,18 +24,32 @@ from rest_framework.status import (
 )
 from rest_framework.viewsets import ModelViewSet
 
+from backend.cache import (
+    INGREDIENTS_CACHE_VERSION,
+    RECIPES_CACHE_VERSION,
+    TAGS_CACHE_VERSION,
+    get_cache_version,
+)
 from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
     User,
+    lock_users,
 )
 from users.models import Subscription
 from .filters import IngredientFilterSet, RecipeFilterSet
 from .mixins import RetriveListViewSet
+from .pagination import PageNumberOrCursorPagination
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (
+    ShoppingListCSVRenderer,
+    ShoppingListPDFRenderer,
+    ShoppingListTextRenderer,
+)
 from .serializers import (
     IngredientSerializer,
     RecipeSerializer,
@@ -35,14 +57,35 @@ from .serializers import (
     SubscribeSerializer,
     TagSerializer,
 )
+from .utils import get_recipe_prefetches
 
 
 class CustomUserViewSet(UserViewSet):
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('username',)
+
     def get_permissions(self):
         if self.action == 'me':
             self.permission_classes = (IsAuthenticated,)
         return super().get_permissions()
 
+    def get_authors_queryset(self):
+        recipes = Recipe.objects.all()
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by=F('author'),
+                    order_by=F('pub_date').desc(),
+                )
+            ).filter(position__lte=int(recipes_limit))
+        return User.objects.annotate(
+            recipes_count=Count('recipes'),
+        ).order_by(
+            *User._meta.ordering
+        ).prefetch_related(Prefetch('recipes', queryset=recipes))
+
     @action(detail=True, methods=('post',))
     def subscribe(self, request, id):
         if request.user.id == id:
@@ -50,7 +93,7 @@ class CustomUserViewSet(UserViewSet):
                 {'errors': 'Нельзя подписаться на самого себя.'},
                 HTTP_400_BAD_REQUEST,
             )
-        author = get_object_or_404(User, id=id)
+        author = get_object_or_404(self.get_authors_queryset(), id=id)
         try:
             Subscription.objects.create(user=request.user, author=author)
         except IntegrityError:
@@ -83,7 +126,9 @@ class CustomUserViewSet(UserViewSet):
 
     @action(detail=False, methods=('get',))
     def subscriptions(self, request):
-        subscriptions = User.objects.filter(subscribers__user=request.user)
+        subscriptions = self.get_authors_queryset().filter(
+            subscribers__user=request.user,
+        )
         page = self.paginate_queryset(subscriptions)
         if page is not None:
             serializer = SubscribeSerializer(
@@ -107,6 +152,22 @@ class IngredientViewSet(RetriveListViewSet):
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilterSet
+    cache_version_name = INGREDIENTS_CACHE_VERSION
+    catalog = {}
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        return self.respond_conditionally(self.list_catalog, request)
+
+    def list_catalog(self, request):
+        content = self.catalog.get(self.cache_version)
+        if content is None:
+            content = JSONRenderer().render(
+                self.get_serializer(self.get_queryset(), many=True).data
+            )
+            IngredientViewSet.catalog = {self.cache_version: content}
+        return HttpResponse(content, content_type='application/json')
 
 
 class TagViewSet(RetriveListViewSet):
@@ -114,33 +175,79 @@ class TagViewSet(RetriveListViewSet):
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    cache_version_name = TAGS_CACHE_VERSION
 
 
 class RecipeViewSet(ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrReadOnly,)
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilterSet
 
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Recipe.objects.select_related('author').prefetch_related(
+            *get_recipe_prefetches()
+        ).defer('search_vector')
+
+    def get_list_cache_key(self, request):
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+            if (key, values) != ('page', ['1'])
+        )
+        return 'recipes:' + md5(
+            repr((request.build_absolute_uri('/'), params)).encode()
+        ).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        if (
+            request.user.is_authenticated
+            or request.accepted_renderer.format != 'json'
+        ):
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key(request)
+        version = get_cache_version(RECIPES_CACHE_VERSION)
+        content = cache.get(key, version=version)
+        if content is None:
+            content = JSONRenderer().render(
+                super().list(request, *args, **kwargs).data
+            )
+            cache.set(
+                key,
+                content,
+                timeout=settings.RECIPES_LIST_CACHE_TIMEOUT,
+                version=version,
+            )
+        return HttpResponse(content, content_type='application/json')
+
     @staticmethod
+    @atomic
     def create_relation(model, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        try:
-            model.objects.create(user=request.user, recipe=recipe)
-        except IntegrityError:
+        lock_users((request.user.id,))
+        if model.objects.filter(user=request.user, recipe=recipe).exists():
             return Response(
                 {'errors': 'Рецепт уже добавлен.'},
                 HTTP_400_BAD_REQUEST,
             )
+        model.objects.create(user=request.user, recipe=recipe)
         return Response(
             RecipeResponseSerializer(recipe).data,
             HTTP_201_CREATED,
         )
 
     @staticmethod
+    @atomic
     def delete_relation(model, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
+        lock_users((request.user.id,))
         try:
             model.objects.get(user=request.user, recipe=recipe).delete()
         except ObjectDoesNotExist:
@@ -169,19 +276,32 @@ class RecipeViewSet(ModelViewSet):
     def delete_shopping_cart(self, request, pk):
         return self.delete_relation(ShoppingCart, request, pk)
 
-    @action(detail=False, methods=('get',))
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListPDFRenderer,
+        ),
+    )
     def download_shopping_cart(self, request):
-        ingredients = Ingredient.objects.filter(
-            recipes__in_shopping_cart__user=request.user
+        ingredients = ShoppingListItem.objects.filter(
+            user=request.user,
         ).values(
-            'name',
-            'measurement_unit',
-        ).annotate(total_amount=Sum('recipe_relations__amount'))
-        template = '{name} ({measurement_unit}) - {total_amount}'
-        file_data = 'Список покупок:\n' + ',\n'.join(
-            template.format(**ingredient) for ingredient in ingredients
+            'total_amount',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+        ).order_by('name', 'measurement_unit')
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator(
+                chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE,
+            )),
+            content_type=renderer.get_content_type(),
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename={renderer.get_filename()}'
         )
-        filename = 'shopping_list.txt'
-        response = HttpResponse(file_data, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
@@ -0,0 +1,39 @@
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+COUNT_CACHE_VERSION = 'pagination_count'
+INGREDIENTS_CACHE_VERSION = 'ingredients'
+TAGS_CACHE_VERSION = 'tags'
+RECIPES_CACHE_VERSION = 'recipes'
+
+
+def is_cache_shared():
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_cache_version_timeout():
+    if is_cache_shared():
+        return None
+    return settings.LOCAL_CACHE_VERSION_TIMEOUT
+
+
+def get_cache_version(name):
+    key = f'version:{name}'
+    version = cache.get(key)
+    if version is None:
+        version = time_ns()
+        cache.add(key, version, timeout=get_cache_version_timeout())
+        version = cache.get(key, version)
+    return version
+
+
+def bump_cache_version(name):
+    cache.set(
+        f'version:{name}',
+        time_ns(),
+        timeout=get_cache_version_timeout(),
+    )
@@ -7,3 +7,13 @@ MAX_LENGTH_FOOD_INFO = 200
 MIN_UNIT = 1
 
 MINUTES_IN_DAY = 1440
+
+MIN_LENGTH_SUBSTRING_SEARCH = 3
+
+SEARCH_CONFIG = 'russian'
+
+IMAGE_VARIANT_SIZES = {'card': 480, 'detail': 1200, 'original': None}
+
+IMAGE_VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+IMAGE_VARIANT_QUALITY = 80
@@ -1,5 +1,6 @@
 from os import getenv
 from pathlib import Path
+from sys import argv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -7,9 +8,11 @@ SECRET_KEY = getenv('DJANGO_SECRET_KEY', 'django_secret_key')
 
 DEBUG = False
 
+TESTING = len(argv) > 1 and argv[1] == 'test'
+
 ALLOWED_HOSTS = getenv('DJANGO_ALLOWED_HOSTS', '*').split()
 
-CSRF_TRUSTED_ORIGINS = [getenv('DJANGO_CSRF_TRUSTED_ORIGINS', '')]
+CSRF_TRUSTED_ORIGINS = getenv('DJANGO_CSRF_TRUSTED_ORIGINS', '').split()
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -58,7 +61,7 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
-if DEBUG:
+if DEBUG or TESTING:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -74,6 +77,23 @@ else:
             'PASSWORD': getenv('POSTGRES_PASSWORD', 'django'),
             'HOST': getenv('DB_HOST', ''),
             'PORT': getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': int(getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS':
+                getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        }
+    }
+
+if getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
@@ -112,7 +132,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -121,6 +141,45 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+LOCAL_CACHE_VERSION_TIMEOUT = int(getenv('LOCAL_CACHE_VERSION_TIMEOUT', 30))
+
+AUTH_TOKEN_CACHE_SIZE = int(getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+)
+
+RECIPES_LIST_CACHE_TIMEOUT = int(getenv('RECIPES_LIST_CACHE_TIMEOUT', 300))
+
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD', 10000)
+)
+
+IMAGE_PROCESSING_WORKERS = int(getenv('IMAGE_PROCESSING_WORKERS', 2))
+
+RECIPE_IMAGE_MAX_SIZE = int(getenv('RECIPE_IMAGE_MAX_SIZE', 5 * 1024 * 1024))
+
+SHOPPING_LIST_CHUNK_SIZE = 2000
+
+RECIPES_TRANSFER_BATCH_SIZE = int(
+    getenv('RECIPES_TRANSFER_BATCH_SIZE', 1000)
+)
+
+INGREDIENTS_IMPORT_BATCH_SIZE = int(
+    getenv('INGREDIENTS_IMPORT_BATCH_SIZE', 5000)
+)
+
+STALE_FILES_BATCH_SIZE = int(getenv('STALE_FILES_BATCH_SIZE', 500))
+
+STALE_FILES_GRACE_PERIOD = int(getenv('STALE_FILES_GRACE_PERIOD', 15 * 60))
+
+SHOPPING_LIST_PDF_FONT = getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
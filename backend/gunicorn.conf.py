@@ -0,0 +1,6 @@
+from os import getenv
+
+bind = '0.0.0.0:8000'
+worker_class = 'gthread'
+workers = int(getenv('GUNICORN_WORKERS', 2))
+threads = int(getenv('GUNICORN_THREADS', 4))
@@ -1,6 +1,15 @@
 from django.contrib.admin import ModelAdmin, TabularInline, display, register
+from django.db.transaction import on_commit
 
-from .models import Ingredient, Recipe, RecipeIngredient, RecipeTag, Tag
+from .images import schedule_image_processing
+from .models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingListItem,
+    Tag,
+)
 
 
 @register(Ingredient)
@@ -50,6 +59,19 @@ class RecipeAdmin(ModelAdmin):
         queryset = super().get_queryset(request)
         return queryset.prefetch_related('tags', 'ingredients')
 
+    def save_model(self, request, recipe, form, change):
+        super().save_model(request, recipe, form, change)
+        if change and not recipe.image_replaced:
+            return
+        on_commit(lambda: schedule_image_processing(recipe.id))
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        Recipe.objects.filter(id=form.instance.id).update_search_vector()
+        ShoppingListItem.objects.rebuild(
+            form.instance.in_shopping_cart.values_list('user', flat=True)
+        )
+
     @display(description='Ингредиенты')
     def get_ingredients(self, recipe):
         return ", ".join(
@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from logging import getLogger
+from pathlib import PurePosixPath
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps
+
+from backend.cache import RECIPES_CACHE_VERSION, bump_cache_version
+from backend.constants import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_SIZES,
+)
+
+logger = getLogger(__name__)
+
+executor = None
+executor_lock = Lock()
+
+
+def get_variant_path(image_name, variant, extension):
+    stem = PurePosixPath(image_name).stem
+    return f'recipes/variants/{stem}/{variant}.{extension}'
+
+
+def build_image_variants(recipe):
+    storage = default_storage
+    with recipe.image.open('rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file)).convert('RGB')
+    variants = {}
+    for variant, size in IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        if size:
+            resized.thumbnail((size, size))
+        variants[variant] = {}
+        for extension, image_format in IMAGE_VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+            path = get_variant_path(recipe.image.name, variant, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            variants[variant][extension] = storage.save(
+                path,
+                ContentFile(buffer.getvalue()),
+            )
+    return variants
+
+
+def delete_recipe_image(image_name):
+    default_storage.delete(image_name)
+    for variant in IMAGE_VARIANT_SIZES:
+        for extension in IMAGE_VARIANT_FORMATS:
+            default_storage.delete(
+                get_variant_path(image_name, variant, extension)
+            )
+
+
+def is_variants_of(variants, image_name):
+    return all(
+        variants.get(variant, {}).get(extension)
+        == get_variant_path(image_name, variant, extension)
+        for variant in IMAGE_VARIANT_SIZES
+        for extension in IMAGE_VARIANT_FORMATS
+    )
+
+
+def process_recipe_image(recipe_id, reuse=True):
+    from .models import Recipe
+
+    recipe = Recipe.objects.filter(id=recipe_id).only('id', 'image').first()
+    if recipe is None or not recipe.image:
+        return
+    variants = None
+    if reuse:
+        candidates = Recipe.objects.filter(
+            image=recipe.image.name,
+        ).exclude(id=recipe.id).exclude(image_variants={}).values_list(
+            'image_variants',
+            flat=True,
+        )
+        variants = next(
+            (
+                candidate for candidate in candidates
+                if is_variants_of(candidate, recipe.image.name)
+            ),
+            None,
+        )
+    Recipe.objects.filter(id=recipe.id, image=recipe.image.name).update(
+        image_variants=variants or build_image_variants(recipe),
+    )
+    bump_cache_version(RECIPES_CACHE_VERSION)
+
+
+def process_in_worker(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать изображение рецепта %s.',
+                         recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_image_processing(recipe_id):
+    global executor
+    if not settings.IMAGE_PROCESSING_WORKERS:
+        process_recipe_image(recipe_id)
+        return
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+    executor.submit(process_in_worker, recipe_id)
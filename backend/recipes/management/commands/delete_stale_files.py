@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+from django.utils.timezone import now
+
+from recipes.images import delete_recipe_image
+from recipes.models import Recipe, StaleFile
+
+
+def is_modified_after(name, moment):
+    try:
+        return default_storage.get_modified_time(name) > moment
+    except FileNotFoundError:
+        return False
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы фотографий, на которые больше не ссылаются рецепты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.STALE_FILES_BATCH_SIZE,
+            help='Количество записей, обрабатываемых за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=settings.STALE_FILES_GRACE_PERIOD,
+            help=(
+                'Сколько секунд не трогать недавно добавленные '
+                'или сохранённые файлы.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(seconds=options['grace_period'])
+        deleted = 0
+        last_id = 0
+        while True:
+            with atomic():
+                batch = list(
+                    StaleFile.objects.select_for_update(
+                        skip_locked=True,
+                    ).filter(
+                        id__gt=last_id,
+                        created__lte=cutoff,
+                    ).values_list('id', 'name')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                recent = {
+                    name for _, name in batch
+                    if is_modified_after(name, cutoff)
+                }
+                names = {name for _, name in batch} - recent
+                names -= set(
+                    Recipe.objects.filter(image__in=names).values_list(
+                        'image',
+                        flat=True,
+                    )
+                )
+                for name in names:
+                    delete_recipe_image(name)
+                StaleFile.objects.filter(
+                    id__in=[
+                        file_id for file_id, name in batch
+                        if name not in recent
+                    ]
+                ).delete()
+            deleted += len(names)
+        self.stdout.write(f'Удалено файлов: {deleted}.')
@@ -0,0 +1,75 @@
+import json
+from base64 import b64encode
+from mimetypes import guess_type
+from sys import stdout
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import Recipe, RecipeIngredient
+
+
+class Command(BaseCommand):
+    help = 'Выгружает рецепты в формате JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='Файл для выгрузки; по умолчанию — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.RECIPES_TRANSFER_BATCH_SIZE,
+            help='Количество рецептов, читаемых из базы за один раз.',
+        )
+        parser.add_argument(
+            '--embed-images',
+            action='store_true',
+            help='Включить фотографии в выгрузку в виде base64.',
+        )
+
+    def get_image(self, recipe, embed):
+        if not embed:
+            return recipe.image.name
+        with recipe.image.open('rb') as file:
+            content = b64encode(file.read()).decode()
+        content_type, _ = guess_type(recipe.image.name)
+        return f'data:{content_type};base64,{content}'
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_relations',
+                queryset=RecipeIngredient.objects.select_related('ingredient'),
+            ),
+        ).defer('search_vector').order_by('id')
+        output = open(options['path'], 'w') if options['path'] else stdout
+        exported = 0
+        try:
+            for recipe in recipes.iterator(chunk_size=options['chunk_size']):
+                output.write(json.dumps({
+                    'name': recipe.name,
+                    'author': recipe.author.email,
+                    'text': recipe.text,
+                    'cooking_time': recipe.cooking_time,
+                    'image': self.get_image(recipe, options['embed_images']),
+                    'tags': [tag.slug for tag in recipe.tags.all()],
+                    'ingredients': [
+                        {
+                            'name': relation.ingredient.name,
+                            'measurement_unit':
+                                relation.ingredient.measurement_unit,
+                            'amount': relation.amount,
+                        }
+                        for relation in recipe.ingredient_relations.all()
+                    ],
+                }, ensure_ascii=False) + '\n')
+                exported += 1
+        finally:
+            if output is not stdout:
+                output.close()
+        self.stderr.write(f'Выгружено рецептов: {exported}.')
@@ -1,14 +1,106 @@
+import json
 from csv import reader
-from django.core.management import BaseCommand
+from itertools import islice
+from pathlib import Path
 
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from backend.cache import INGREDIENTS_CACHE_VERSION, bump_cache_version
 from recipes.models import Ingredient
 
+CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for number, row in enumerate(reader(file), 1):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise CommandError(f'Строка {number}: ожидается два столбца.')
+        yield row
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив ингредиентов.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().removeprefix(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON-файл.')
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        with open('recipes/data/ingredients.csv', 'r', newline='') as csvfile:
-            data = [
+    help = 'Загружает ингредиенты из файла CSV или JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=settings.BASE_DIR / 'recipes' / 'data' / 'ingredients.csv',
+            help='Файл с ингредиентами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.INGREDIENTS_IMPORT_BATCH_SIZE,
+            help='Количество ингредиентов, сохраняемых за один запрос.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней загруженной записи; '
+                 'при повторном запуске загрузка продолжится с неё.',
+        )
+
+    def import_batch(self, batch):
+        rows = {
+            (name.strip(), measurement_unit.strip()) for name, measurement_unit
+            in batch
+        }
+        existing = set(Ingredient.objects.filter(
+            name__in={name for name, _ in rows},
+        ).values_list('name', 'measurement_unit'))
+        created = Ingredient.objects.bulk_create(
+            [
                 Ingredient(name=name, measurement_unit=measurement_unit)
-                for name, measurement_unit in reader(csvfile)
-            ]
-        Ingredient.objects.bulk_create(data)
+                for name, measurement_unit in rows - existing
+            ],
+            ignore_conflicts=True,
+        )
+        return len(created)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        path = Path(options['path'])
+        checkpoint = 0
+        if options['checkpoint'] and Path(options['checkpoint']).exists():
+            checkpoint = int(Path(options['checkpoint']).read_text())
+        read = read_json if path.suffix == '.json' else read_csv
+        inserted = skipped = 0
+        with open(path, 'r', newline='') as file:
+            records = islice(enumerate(read(file), 1), checkpoint, None)
+            while batch := list(islice(records, options['batch_size'])):
+                created = self.import_batch(row for _, row in batch)
+                inserted += created
+                skipped += len(batch) - created
+                if options['checkpoint']:
+                    Path(options['checkpoint']).write_text(str(batch[-1][0]))
+        if inserted:
+            bump_cache_version(INGREDIENTS_CACHE_VERSION)
+        self.stdout.write(
+            f'Добавлено ингредиентов: {inserted}, пропущено: {skipped}.'
+        )
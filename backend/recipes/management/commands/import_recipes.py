@@ -0,0 +1,214 @@
+import json
+from base64 import b64decode
+from binascii import Error as BinasciiError
+from itertools import islice
+from mimetypes import guess_extension
+from pathlib import Path
+from time import monotonic
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.management import BaseCommand, CommandError
+from django.db.transaction import atomic
+
+from backend.cache import (
+    COUNT_CACHE_VERSION,
+    RECIPES_CACHE_VERSION,
+    bump_cache_version,
+)
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    StaleFile,
+    Tag,
+    User,
+)
+
+
+class Command(BaseCommand):
+    help = 'Загружает рецепты из файла в формате JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с рецептами.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.RECIPES_TRANSFER_BATCH_SIZE,
+            help='Количество рецептов, сохраняемых за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней загруженной строки; '
+                 'при повторном запуске загрузка продолжится с неё.',
+        )
+
+    def read_checkpoint(self, path):
+        if path and Path(path).exists():
+            return int(Path(path).read_text())
+        return 0
+
+    def save_image(self, image):
+        if not image.startswith('data:'):
+            return image
+        header, _, content = image.partition(';base64,')
+        extension = guess_extension(header.removeprefix('data:')) or ''
+        try:
+            content = b64decode(content, validate=True)
+        except BinasciiError:
+            raise ValueError('некорректное изображение')
+        storage = Recipe._meta.get_field('image').storage
+        name = storage.save(f'recipes/image{extension}', ContentFile(content))
+        self.saved_images.append(name)
+        return name
+
+    def build_recipe(self, data, authors, tags, ingredients):
+        try:
+            recipe = Recipe(
+                name=data['name'],
+                author_id=authors[data['author']],
+                text=data['text'],
+                cooking_time=data['cooking_time'],
+            )
+            recipe_tags = [tags[slug] for slug in data['tags']]
+            relations = [
+                RecipeIngredient(
+                    ingredient_id=ingredients[(
+                        ingredient['name'],
+                        ingredient['measurement_unit'],
+                    )],
+                    amount=ingredient['amount'],
+                )
+                for ingredient in data['ingredients']
+            ]
+        except KeyError as error:
+            raise ValueError(f'не найдено значение {error}')
+        try:
+            recipe.clean_fields(exclude=('author', 'image'))
+            for relation in relations:
+                relation.clean_fields(exclude=('recipe', 'ingredient'))
+        except ValidationError as error:
+            raise ValueError('; '.join(error.messages))
+        recipe_ingredients = {
+            relation.ingredient_id: relation.amount for relation in relations
+        }
+        recipe.image = self.save_image(data['image'])
+        return recipe, recipe_tags, recipe_ingredients
+
+    def skip(self, number, reason):
+        self.stderr.write(f'Строка {number}: {reason}, пропущена.')
+        self.skipped += 1
+
+    @atomic
+    def import_batch(self, lines, tags, ingredients):
+        records = {}
+        for number, line in lines:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                self.skip(number, 'некорректный JSON')
+                continue
+            if not isinstance(data, dict):
+                self.skip(number, 'запись не является объектом')
+            elif not isinstance(data.get('name'), str):
+                self.skip(number, 'не указано название')
+            elif not isinstance(data.get('author'), str):
+                self.skip(number, 'не указан автор')
+            else:
+                records[number] = data
+        existing = dict(Recipe.objects.filter(
+            name__in=[data.get('name') for data in records.values()],
+        ).values_list('name', 'author_id'))
+        authors = dict(User.objects.filter(
+            email__in=[data.get('author') for data in records.values()],
+        ).values_list('email', 'id'))
+        recipes, relations = [], []
+        for number, data in records.items():
+            name = data.get('name')
+            if name in existing:
+                if existing[name] == authors.get(data.get('author')):
+                    reason = 'рецепт уже загружен'
+                else:
+                    reason = 'название занято рецептом другого автора'
+                self.skip(number, reason)
+                continue
+            try:
+                recipe, recipe_tags, recipe_ingredients = self.build_recipe(
+                    data, authors, tags, ingredients,
+                )
+            except (TypeError, ValueError) as error:
+                self.skip(number, error)
+                continue
+            existing[recipe.name] = recipe.author_id
+            recipes.append(recipe)
+            relations.append((recipe_tags, recipe_ingredients))
+        Recipe.objects.bulk_create(recipes)
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for recipe, (recipe_tags, _) in zip(recipes, relations)
+            for tag_id in set(recipe_tags)
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount,
+            )
+            for recipe, (_, recipe_ingredients) in zip(recipes, relations)
+            for ingredient_id, amount in recipe_ingredients.items()
+        ])
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes],
+        ).update_search_vector()
+        return len(recipes)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        checkpoint = self.read_checkpoint(options['checkpoint'])
+        tags = dict(Tag.objects.values_list('slug', 'id'))
+        ingredients = {
+            (name, measurement_unit): ingredient_id
+            for ingredient_id, name, measurement_unit
+            in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit',
+            )
+        }
+        imported = self.skipped = 0
+        started = monotonic()
+        with open(options['path'], 'r') as file:
+            lines = islice(enumerate(file, 1), checkpoint, None)
+            while batch := list(islice(lines, options['batch_size'])):
+                self.saved_images = []
+                try:
+                    imported += self.import_batch(
+                        [
+                            (number, line) for number, line in batch
+                            if line.strip()
+                        ],
+                        tags,
+                        ingredients,
+                    )
+                except Exception:
+                    StaleFile.objects.bulk_create([
+                        StaleFile(name=name) for name in self.saved_images
+                    ])
+                    raise
+                if options['checkpoint']:
+                    Path(options['checkpoint']).write_text(str(batch[-1][0]))
+                elapsed = monotonic() - started
+                self.stdout.write(
+                    f'Строк обработано: {batch[-1][0]}, '
+                    f'рецептов загружено: {imported}, '
+                    f'пропущено: {self.skipped}, '
+                    f'{imported / elapsed:.0f} рецептов/с.'
+                )
+        if imported:
+            bump_cache_version(COUNT_CACHE_VERSION)
+            bump_cache_version(RECIPES_CACHE_VERSION)
+        self.stdout.write(
+            f'Загружено рецептов: {imported}, пропущено: {self.skipped} '
+            f'за {monotonic() - started:.1f} с.'
+        )
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки покупок пользователей по их корзинам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сравнить сохранённые списки с корзинами.',
+        )
+
+    def handle(self, *args, **options):
+        expected = set(ShoppingListItem.objects.get_expected_rows())
+        actual = set(ShoppingListItem.objects.values_list(
+            'user',
+            'ingredient',
+            'total_amount',
+        ))
+        mismatches = len(expected ^ actual)
+        self.stdout.write(f'Расхождений: {mismatches}.')
+        if options['check']:
+            return
+        items = ShoppingListItem.objects.rebuild()
+        self.stdout.write(f'Пересчитано позиций: {len(items)}.')
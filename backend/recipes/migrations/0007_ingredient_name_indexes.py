@@ -0,0 +1,27 @@
+# Generated by Django 4.2.5 on 2026-10-18 04:53
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from recipes.operations import PostgresRunSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_shoppinglistitem'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        PostgresRunSQL(
+            'CREATE INDEX ingredient_name_prefix_idx ON recipes_ingredient '
+            '(UPPER(name) text_pattern_ops);',
+            'DROP INDEX ingredient_name_prefix_idx;',
+        ),
+        PostgresRunSQL(
+            'CREATE INDEX ingredient_name_trgm_idx ON recipes_ingredient '
+            'USING gin (UPPER(name) gin_trgm_ops);',
+            'DROP INDEX ingredient_name_trgm_idx;',
+        ),
+    ]
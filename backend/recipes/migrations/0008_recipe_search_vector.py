@@ -0,0 +1,56 @@
+# Generated by Django 4.2.5 on 2026-10-18 04:55
+
+from django.contrib.postgres.aggregates import StringAgg
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from recipes.operations import PostgresRunSQL
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ingredient_names = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk'),
+    ).values('recipe').annotate(
+        names=StringAgg('ingredient__name', delimiter=' '),
+    ).values('names')
+    Recipe.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='russian')
+        + SearchVector(
+            Coalesce(
+                Subquery(ingredient_names),
+                Value(''),
+                output_field=TextField(),
+            ),
+            weight='B',
+            config='russian',
+        )
+        + SearchVector('text', weight='C', config='russian')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        PostgresRunSQL(
+            'CREATE INDEX recipe_search_idx ON recipes_recipe '
+            'USING gin (search_vector);',
+            'DROP INDEX recipe_search_idx;',
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.5 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_image_content_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Путь к файлу')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')),
+            ],
+            options={
+                'verbose_name': 'Файл к удалению',
+                'verbose_name_plural': 'Файлы к удалению',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.5 on 2026-10-18 05:04
+
+from django.db import migrations, models
+
+
+def merge_references(model, owner, amount, duplicate_id, keeper_id):
+    kept = dict(model.objects.filter(ingredient=keeper_id).values_list(
+        owner,
+        'id',
+    ))
+    for row in model.objects.filter(ingredient=duplicate_id):
+        owner_id = getattr(row, f'{owner}_id')
+        if owner_id not in kept:
+            row.ingredient_id = keeper_id
+            row.save(update_fields=('ingredient',))
+            continue
+        model.objects.filter(id=kept[owner_id]).update(
+            **{amount: models.F(amount) + getattr(row, amount)}
+        )
+        row.delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = Ingredient.objects.values(
+        'name',
+        'measurement_unit',
+    ).annotate(
+        keeper_id=models.Min('id'),
+        total=models.Count('id'),
+    ).filter(total__gt=1)
+    for duplicate in duplicates:
+        duplicate_ids = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=duplicate['keeper_id']).values_list('id', flat=True)
+        for duplicate_id in duplicate_ids:
+            merge_references(
+                RecipeIngredient, 'recipe', 'amount',
+                duplicate_id, duplicate['keeper_id'],
+            )
+            merge_references(
+                ShoppingListItem, 'user', 'total_amount',
+                duplicate_id, duplicate['keeper_id'],
+            )
+        Ingredient.objects.filter(id__in=list(duplicate_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_stalefile'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients,
+            migrations.RunPython.noop,
+        ),
+    ]
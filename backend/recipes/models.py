@@ -1,21 +1,41 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connections
 from django.db.models import (
+    Manager,
     Model,
     CharField,
     DateTimeField,
     ImageField,
+    JSONField,
     ManyToManyField,
+    PositiveIntegerField,
     PositiveSmallIntegerField,
     TextField,
     SlugField,
     ForeignKey,
     CASCADE,
+    Index,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
     UniqueConstraint,
+    Value,
 )
+from django.db.models.functions import Coalesce
+from django.db.transaction import atomic
 
-from backend.constants import MAX_LENGTH_FOOD_INFO, MINUTES_IN_DAY, MIN_UNIT
+from backend.constants import (
+    MAX_LENGTH_FOOD_INFO,
+    MINUTES_IN_DAY,
+    MIN_UNIT,
+    SEARCH_CONFIG,
+)
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -34,6 +54,12 @@ class Ingredient(Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = (
+            UniqueConstraint(
+                name='unique_ingredient',
+                fields=('name', 'measurement_unit'),
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -61,6 +87,31 @@ class Tag(Model):
         return self.name
 
 
+class RecipeQuerySet(QuerySet):
+
+    def update_search_vector(self):
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        ingredient_names = RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk'),
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', delimiter=' '),
+        ).values('names')
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                Coalesce(
+                    Subquery(ingredient_names),
+                    Value(''),
+                    output_field=TextField(),
+                ),
+                weight='B',
+                config=SEARCH_CONFIG,
+            )
+            + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        ))
+
+
 class Recipe(Model):
     author = ForeignKey(
         User,
@@ -81,6 +132,12 @@ class Recipe(Model):
     image = ImageField(
         verbose_name='Фотография готового блюда',
         upload_to='recipes/',
+        storage=ContentAddressedStorage(),
+    )
+    image_variants = JSONField(
+        verbose_name='Уменьшенные копии фотографии',
+        default=dict,
+        editable=False,
     )
     text = TextField(verbose_name='Описание')
     ingredients = ManyToManyField(
@@ -108,6 +165,13 @@ class Recipe(Model):
             ),
         ),
     )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -117,10 +181,6 @@ class Recipe(Model):
     def __str__(self):
         return self.name
 
-    def delete(self, using=None, keep_parents=False):
-        self.image.storage.delete(self.image.name)
-        super().delete()
-
 
 class RecipeIngredient(Model):
     recipe = ForeignKey(
@@ -177,6 +237,9 @@ class RecipeTag(Model):
                 fields=('recipe', 'tag'),
             ),
         )
+        indexes = (
+            Index(fields=('tag', 'recipe'), name='recipe_tag_tag_recipe_idx'),
+        )
 
 
 class Favorite(Model):
@@ -221,3 +284,106 @@ class ShoppingCart(Model):
                 fields=('user', 'recipe'),
             ),
         )
+
+
+def lock_users(user_ids):
+    return list(User.objects.select_for_update().filter(
+        id__in=user_ids,
+    ).order_by('id').values_list('id', flat=True))
+
+
+class ShoppingListItemManager(Manager):
+
+    def get_expected_rows(self, user_ids=None):
+        if user_ids is None:
+            carts = {'recipe__in_shopping_cart__user__isnull': False}
+        else:
+            carts = {'recipe__in_shopping_cart__user__in': user_ids}
+        return RecipeIngredient.objects.filter(**carts).values_list(
+            'recipe__in_shopping_cart__user',
+            'ingredient',
+        ).annotate(total_amount=Sum('amount')).order_by()
+
+    @atomic
+    def rebuild(self, user_ids=None):
+        items = self.all()
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            items = items.filter(user__in=user_ids)
+        items.delete()
+        return self.bulk_create([
+            self.model(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total_amount,
+            ) for user_id, ingredient_id, total_amount
+            in self.get_expected_rows(user_ids)
+        ])
+
+    @atomic
+    def apply_changes(self, changes):
+        changes = {key: delta for key, delta in changes.items() if delta}
+        if not changes:
+            return
+        lock_users({user_id for user_id, _ in changes})
+        items = {
+            (item.user_id, item.ingredient_id): item
+            for item in self.select_for_update().filter(
+                user__in={user_id for user_id, _ in changes},
+                ingredient__in={ingredient_id for _, ingredient_id in changes},
+            )
+        }
+        created, updated, deleted = [], [], []
+        for (user_id, ingredient_id), delta in changes.items():
+            item = items.get((user_id, ingredient_id))
+            if item is None:
+                if delta > 0:
+                    created.append(self.model(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=delta,
+                    ))
+                continue
+            item.total_amount = max(item.total_amount + delta, 0)
+            if item.total_amount:
+                updated.append(item)
+            else:
+                deleted.append(item.id)
+        self.bulk_create(created)
+        self.bulk_update(updated, ('total_amount',))
+        self.filter(id__in=deleted).delete()
+
+
+class ShoppingListItem(Model):
+    user = ForeignKey(
+        User,
+        on_delete=CASCADE,
+        related_name='shopping_list',
+    )
+    ingredient = ForeignKey(
+        Ingredient,
+        on_delete=CASCADE,
+        related_name='shopping_list_items',
+    )
+    total_amount = PositiveIntegerField(verbose_name='Общее количество')
+
+    objects = ShoppingListItemManager()
+
+    class Meta:
+        ordering = ('user',)
+        constraints = (
+            UniqueConstraint(
+                name='unique_ingredient_in_shopping_list',
+                fields=('user', 'ingredient'),
+            ),
+        )
+
+
+class StaleFile(Model):
+    name = CharField(verbose_name='Путь к файлу', max_length=255)
+    created = DateTimeField(verbose_name='Дата добавления', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл к удалению'
+        verbose_name_plural = 'Файлы к удалению'
+        ordering = ('id',)
@@ -0,0 +1,12 @@
+from django.db.migrations import RunSQL
+
+
+class PostgresRunSQL(RunSQL):
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, *args)
@@ -0,0 +1,32 @@
+import os
+from hashlib import sha256
+from pathlib import PurePosixPath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_content_name(self, name, content):
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        path = PurePosixPath(name)
+        checksum = digest.hexdigest()
+        return str(
+            path.parent / checksum[:2] / f'{checksum}{path.suffix.lower()}'
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
@@ -7,6 +7,7 @@ const Card = ({
   name = 'Без названия',
   id,
   image,
+  image_variants = {},
   is_favorited,
   is_in_shopping_cart,
   tags,
@@ -17,11 +18,12 @@ const Card = ({
   updateOrders
 }) => {
   const authContext = useContext(AuthContext)
+  const cardImage = (image_variants.card && image_variants.card.webp) || image
   return <div className={styles.card}>
       <LinkComponent
         className={styles.card__title}
         href={`/recipes/${id}`}
-        title={<div className={styles.card__image} style={{ backgroundImage: `url(${ image })` }} />}
+        title={<div className={styles.card__image} style={{ backgroundImage: `url(${ cardImage })` }} />}
       />
       <div className={styles.card__body}>
         <LinkComponent